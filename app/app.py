@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import sys
+import uuid
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import plotly.express as px
-from dash import Dash, Input, Output, dash_table, dcc, html
+from dash import Dash, Input, Output, State, ctx, dash_table, dcc, html, no_update
+from dash.exceptions import PreventUpdate
 
 # Ensure repo root is on sys.path so `from src...` imports work when running `python app/app.py`
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -15,6 +17,7 @@ if str(REPO_ROOT) not in sys.path:
 
 from src.io import load_sample
 from src.core import compute_monthly, dq_indicators, filter_df, kpis, pareto_curve, ensure_display_columns
+from src.core import CallbackExecutor, Superseded, build_distinct_cube, checkpoint, rollup_kpis
 
 
 # -----------------------------
@@ -41,6 +44,13 @@ fact_enriched = fact_enriched.merge(dim_products, on="product_key", how="left",
 # Precompute global DQ indicators for the sample (shown on DQ tab)
 dq = dq_indicators(fact_enriched, dim_customers, dim_products)
 
+# Pre-rolled sketch cube: cheap approximate KPIs shown while a slow slice is still computing
+cube = build_distinct_cube(fact_enriched)
+
+# Bounded worker pool for render_tab: coalesces identical requests, drops stale ones per session,
+# and falls back to the cube after the time budget
+executor = CallbackExecutor(max_workers=4, budget_s=1.5)
+
 
 # -----------------------------
 # UI helpers
@@ -139,41 +149,69 @@ controls = html.Div(
 app = Dash(__name__)
 app.title = "Commercial Analytics Dashboard"
 
-app.layout = html.Div(
-    [
-        html.H1("Commercial Analytics Dashboard"),
-        html.Div("Dash and the notebook dashboard are designed to show the same KPIs and views."),
-        html.Hr(),
-        controls,
-        html.Br(),
-        dcc.Tabs(
-            id="tabs",
-            value="exec",
-            children=[
-                dcc.Tab(label="Executive", value="exec"),
-                dcc.Tab(label="Trends", value="trends"),
-                dcc.Tab(label="Customers", value="customers"),
-                dcc.Tab(label="Products", value="products"),
-                dcc.Tab(label="Data Quality", value="dq"),
-            ],
-            persistence=False,
-        ),
-        html.Div(id="tab_content"),
-        html.Br(),
-        html.Hr(),
-        html.Div(
-            [
-                html.H3("Data quality indicators (sample extract)"),
-                html.Ul([html.Li(f"{k}: {v}") for k, v in dq.items()]),
-            ]
-        ),
-    ],
-    style={"maxWidth": "1200px", "margin": "0 auto", "padding": "18px"},
-)
+
+def serve_layout():
+    # A fresh session_id per page load lets the executor discard this tab's stale requests
+    return html.Div(
+        [
+            dcc.Store(id="session_id", data=str(uuid.uuid4())),
+            dcc.Interval(id="poll", interval=500, disabled=True),
+            html.H1("Commercial Analytics Dashboard"),
+            html.Div("Dash and the notebook dashboard are designed to show the same KPIs and views."),
+            html.Hr(),
+            controls,
+            html.Br(),
+            dcc.Tabs(
+                id="tabs",
+                value="exec",
+                children=[
+                    dcc.Tab(label="Executive", value="exec"),
+                    dcc.Tab(label="Trends", value="trends"),
+                    dcc.Tab(label="Customers", value="customers"),
+                    dcc.Tab(label="Products", value="products"),
+                    dcc.Tab(label="Data Quality", value="dq"),
+                ],
+                persistence=False,
+            ),
+            html.Div(id="tab_content"),
+            html.Br(),
+            html.Hr(),
+            html.Div(
+                [
+                    html.H3("Data quality indicators (sample extract)"),
+                    html.Ul([html.Li(f"{k}: {v}") for k, v in dq.items()]),
+                ]
+            ),
+        ],
+        style={"maxWidth": "1200px", "margin": "0 auto", "padding": "18px"},
+    )
+
+
+app.layout = serve_layout
+
+
+def partial_view(s, e, seg, cat, subcat):
+    k = rollup_kpis(cube, s, e, seg, cat, subcat)
+    return html.Div(
+        [
+            html.Div("Computing full view… showing approximate KPIs.", style={"color": "#777"}),
+            html.Div(
+                [
+                    card("Revenue", money0(k["revenue"])),
+                    card("Orders", f"~{k['orders']:,}"),
+                    card("Active Customers", f"~{k['customers']:,}"),
+                    card("AOV", f"~{money0(k['aov'])}" if pd.notna(k["aov"]) else "—", "Revenue / Orders"),
+                    card("Units per Order", f"~{k['upo']:,.2f}" if pd.notna(k["upo"]) else "—"),
+                ],
+                style={"display": "flex", "gap": "12px", "flexWrap": "wrap"},
+            ),
+        ]
+    )
 
 
 @app.callback(
     Output("tab_content", "children"),
+    Output("poll", "disabled"),
     Input("tabs", "value"),
     Input("start_month", "value"),
     Input("end_month", "value"),
@@ -181,14 +219,43 @@ app.layout = html.Div(
     Input("category", "value"),
     Input("subcategory", "value"),
     Input("topn", "value"),
+    Input("poll", "n_intervals"),
+    State("session_id", "data"),
 )
-def render_tab(tab, s, e, seg, cat, subcat, topn):
+def render_tab(tab, s, e, seg, cat, subcat, topn, _n, session_id):
     if s > e:
-        return html.Div("Start month must be <= End month.", style={"color": "crimson"})
-
+        return html.Div("Start month must be <= End month.", style={"color": "crimson"}), True
+
+    # While the full view is pending, the enabled poll re-issues the same key until it lands in the cache.
+    # Poll ticks only check (budget 0) and leave the partial view in place, so they never hold a request thread.
+    key = (tab, s, e, seg, cat, subcat, topn)
+    polled = ctx.triggered_id == "poll"
+    try:
+        view, done = executor.run(
+            session_id,
+            key,
+            lambda cancel: render_view(*key, cancel=cancel),
+            partial=None if polled else (lambda: partial_view(s, e, seg, cat, subcat)),
+            budget_s=0 if polled else None,
+        )
+    except Superseded:
+        raise PreventUpdate
+    except Exception as exc:
+        # Disable the poll, otherwise it would keep re-requesting a failing view
+        return html.Div(f"Could not render this view: {exc}", style={"color": "crimson"}), True
+    if polled and not done:
+        return no_update, False
+    return view, done
+
+
+def render_view(tab, s, e, seg, cat, subcat, topn, cancel=None):
+    # checkpoint() stops here once a newer request from the same session made this one stale
     df = filter_df(fact_enriched, s, e, seg, cat, subcat)
+    checkpoint(cancel)
     k = kpis(df)
+    checkpoint(cancel)
     monthly = compute_monthly(df)
+    checkpoint(cancel)
 
     if tab == "exec":
         cards = html.Div(
@@ -210,12 +277,15 @@ def render_tab(tab, s, e, seg, cat, subcat, topn):
 
         fig = px.line(monthly, x="year_month", y="revenue", title="Monthly Revenue")
         fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+        checkpoint(cancel)
 
         return html.Div([cards, html.Br(), dcc.Graph(figure=fig)])
 
     if tab == "trends":
         fig1 = px.line(monthly, x="year_month", y="revenue", title="Monthly Revenue")
+        checkpoint(cancel)
         fig2 = px.line(monthly, x="year_month", y="orders", title="Monthly Orders")
+        checkpoint(cancel)
         fig3 = px.line(monthly, x="year_month", y="rolling_3m_revenue", title="Rolling 3M Revenue (Avg)")
         return html.Div([dcc.Graph(figure=fig1), dcc.Graph(figure=fig2), dcc.Graph(figure=fig3)])
 
@@ -227,12 +297,16 @@ def render_tab(tab, s, e, seg, cat, subcat, topn):
             .head(int(topn))
             .reset_index()
         )
+        checkpoint(cancel)
         fig = px.bar(top, x="sales_amount", y="customer_name", orientation="h", title=f"Top {int(topn)} Customers by Revenue")
         fig.update_layout(yaxis={"categoryorder": "total ascending"}, margin=dict(l=20, r=20, t=50, b=20))
 
+        checkpoint(cancel)
         pareto = pareto_curve(df, "customer_name", "sales_amount")
+        checkpoint(cancel)
         pareto_fig = px.line(pareto, x="rank", y="cum_share", title="Customer Pareto Curve (Cumulative Revenue Share)")
         pareto_fig.update_yaxes(tickformat=".0%")
+        checkpoint(cancel)
 
         #seg_table = None
         if "customer_segment" in df.columns:
@@ -260,12 +334,16 @@ def render_tab(tab, s, e, seg, cat, subcat, topn):
 
     if tab == "products":
         top = df.groupby("product_name")["sales_amount"].sum().sort_values(ascending=False).head(int(topn)).reset_index()
+        checkpoint(cancel)
         fig = px.bar(top, x="sales_amount", y="product_name", orientation="h", title=f"Top {int(topn)} Products by Revenue")
         fig.update_layout(yaxis={"categoryorder": "total ascending"}, margin=dict(l=20, r=20, t=50, b=20))
 
+        checkpoint(cancel)
         pareto = pareto_curve(df, "product_name", "sales_amount")
+        checkpoint(cancel)
         pareto_fig = px.line(pareto, x="rank", y="cum_share", title="Product Pareto Curve (Cumulative Revenue Share)")
         pareto_fig.update_yaxes(tickformat=".0%")
+        checkpoint(cancel)
 
         if "category" in df.columns:
             cols = ["category"] + (["subcategory"] if "subcategory" in df.columns else [])
@@ -283,6 +361,7 @@ def render_tab(tab, s, e, seg, cat, subcat, topn):
     if tab == "dq":
         nulls = df.isna().mean().sort_values(ascending=False).head(12).reset_index()
         nulls.columns = ["field", "null_rate"]
+        checkpoint(cancel)
         table = dash_table.DataTable(
             data=nulls.to_dict("records"),
             columns=[{"name":"field","id":"field"},{"name":"null_rate","id":"null_rate"}],
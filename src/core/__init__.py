@@ -3,3 +3,6 @@ from .filters import filter_df, money0
 from .metrics import compute_monthly, kpis, pareto_curve
 from .dq import dq_indicators
 from .paths import ensure_output_dirs
+from .contracts import CONTRACTS, ColumnRule, TableContract, to_dq_summary, validate_csv, validate_extracts, validate_frame
+from .sketches import DistinctSketch, build_distinct_cube, cube_from_frame, cube_to_frame, rollup_kpis, rollup_monthly
+from .executor import CallbackExecutor, Superseded, checkpoint
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import io
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """Expectations for a single column.
+
+    dtype is one of "int", "float", "datetime" or "string"; values that fail to
+    convert to it (e.g. dates that `errors="coerce"` would silently turn into NaT)
+    are counted as dtype violations. Range bounds use the same conversion.
+    """
+
+    dtype: str = "string"
+    nullable: bool = True
+    min_value: float | str | None = None
+    max_value: float | str | None = None
+    allowed: tuple[str, ...] | None = None
+
+
+@dataclass(frozen=True)
+class TableContract:
+    name: str
+    columns: dict[str, ColumnRule]
+    unique_keys: tuple[tuple[str, ...], ...] = field(default_factory=tuple)
+
+
+CONTRACTS = {
+    "fact_sales": TableContract(
+        name="fact_sales",
+        columns={
+            "order_number": ColumnRule(nullable=False),
+            "product_key": ColumnRule("int", nullable=False, min_value=1),
+            "customer_key": ColumnRule("int", nullable=False, min_value=1),
+            "order_date": ColumnRule("datetime", nullable=False, min_value="2000-01-01"),
+            "shipping_date": ColumnRule("datetime"),
+            "due_date": ColumnRule("datetime"),
+            "sales_amount": ColumnRule("float", nullable=False, min_value=0),
+            "quantity": ColumnRule("int", nullable=False, min_value=1),
+            "price": ColumnRule("float", nullable=False, min_value=0),
+        },
+        unique_keys=(("order_number", "product_key"),),
+    ),
+    "dim_customers": TableContract(
+        name="dim_customers",
+        columns={
+            "customer_key": ColumnRule("int", nullable=False, min_value=1),
+            "customer_number": ColumnRule(nullable=False),
+            "marital_status": ColumnRule(allowed=("Married", "Single")),
+            "gender": ColumnRule(allowed=("Female", "Male")),
+            "birthdate": ColumnRule("datetime", min_value="1900-01-01"),
+        },
+        unique_keys=(("customer_key",), ("customer_number",)),
+    ),
+    "dim_products": TableContract(
+        name="dim_products",
+        columns={
+            "product_key": ColumnRule("int", nullable=False, min_value=1),
+            "product_name": ColumnRule(nullable=False),
+            "category": ColumnRule(allowed=("Accessories", "Bikes", "Clothing")),
+            "cost": ColumnRule("float", min_value=0),
+        },
+        unique_keys=(("product_key",),),
+    ),
+    "report_customers": TableContract(
+        name="report_customers",
+        columns={
+            "customer_key": ColumnRule("int", nullable=False, min_value=1),
+            "customer_segment": ColumnRule(nullable=False, allowed=("New", "Regular", "VIP")),
+            "age": ColumnRule("float", min_value=0, max_value=120),
+            "total_orders": ColumnRule("int", min_value=0),
+            "total_sales": ColumnRule("float", min_value=0),
+        },
+        unique_keys=(("customer_key",),),
+    ),
+    "report_products": TableContract(
+        name="report_products",
+        columns={
+            "product_key": ColumnRule("int", nullable=False, min_value=1),
+            "category": ColumnRule(allowed=("Accessories", "Bikes", "Clothing")),
+            "total_sales": ColumnRule("float", min_value=0),
+        },
+        unique_keys=(("product_key",),),
+    ),
+}
+
+
+def _convert(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "datetime":
+        return pd.to_datetime(s, errors="coerce")
+    if dtype in ("int", "float"):
+        return pd.to_numeric(s, errors="coerce")
+    return s
+
+
+def _bound(value, dtype: str):
+    return pd.Timestamp(value) if dtype == "datetime" else value
+
+
+def _key_hashes(df: pd.DataFrame, key: tuple[str, ...]) -> np.ndarray:
+    keys = df[list(key)].dropna()
+    return pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy()
+
+
+def _check_chunk(df: pd.DataFrame, contract: TableContract) -> tuple[int, dict, dict]:
+    """Count rule violations in one chunk.
+
+    Returns (rows, counts keyed by (column, rule), key hashes keyed by unique key).
+    Uniqueness is resolved by the caller because duplicates can span chunks.
+    """
+    counts: dict[tuple[str, str], int] = {}
+    for col, rule in contract.columns.items():
+        if col not in df.columns:
+            counts[(col, "missing_column")] = len(df)
+            continue
+
+        raw = df[col]
+        present = raw.notna()
+        if not rule.nullable:
+            counts[(col, "null")] = int((~present).sum())
+
+        values = _convert(raw, rule.dtype)
+        if rule.dtype != "string":
+            bad = present & values.isna()
+            if rule.dtype == "int":
+                bad |= values.notna() & (values % 1 != 0)
+            counts[(col, "dtype")] = int(bad.sum())
+
+        if rule.min_value is not None or rule.max_value is not None:
+            out = pd.Series(False, index=df.index)
+            if rule.min_value is not None:
+                out |= values < _bound(rule.min_value, rule.dtype)
+            if rule.max_value is not None:
+                out |= values > _bound(rule.max_value, rule.dtype)
+            counts[(col, "range")] = int(out.sum())
+
+        if rule.allowed is not None:
+            counts[(col, "allowed")] = int((present & ~raw.astype(str).isin(rule.allowed)).sum())
+
+    hashes = {}
+    for key in contract.unique_keys:
+        if all(c in df.columns for c in key):
+            hashes[key] = _key_hashes(df, key)
+    return len(df), counts, hashes
+
+
+class _KeyHashes:
+    """Count duplicate uint64 key hashes across chunks (8 bytes per distinct key).
+
+    Hashes are partitioned into 2**bits buckets by their top bits. Each bucket
+    keeps a sorted, de-duplicated base plus pending chunk slices, and is merged
+    only once its pending slices are as large as its base, so every merge
+    touches one bucket and each hash is re-sorted O(log n) times overall.
+    """
+
+    def __init__(self, bits: int = 8, min_merge: int = 4096):
+        n = 1 << bits
+        self.edges = np.arange(1, n, dtype=np.uint64) << np.uint64(64 - bits)
+        self.base = [np.empty(0, dtype=np.uint64) for _ in range(n)]
+        self.pending: list[list[np.ndarray]] = [[] for _ in range(n)]
+        self.pending_len = [0] * n
+        self.min_merge = min_merge
+        self.duplicates = 0
+
+    def add(self, h: np.ndarray) -> None:
+        h = np.sort(h)
+        for b, part in enumerate(np.split(h, np.searchsorted(h, self.edges))):
+            if not len(part):
+                continue
+            self.pending[b].append(part)
+            self.pending_len[b] += len(part)
+            if self.pending_len[b] >= max(len(self.base[b]), self.min_merge):
+                self._merge(b)
+
+    def _merge(self, b: int) -> None:
+        parts = [self.base[b], *self.pending[b]]
+        total = sum(len(p) for p in parts)
+        self.base[b] = np.unique(np.concatenate(parts))
+        self.duplicates += total - len(self.base[b])
+        self.pending[b] = []
+        self.pending_len[b] = 0
+
+    def count_duplicates(self) -> int:
+        for b, n in enumerate(self.pending_len):
+            if n:
+                self._merge(b)
+        return self.duplicates
+
+
+class _Accumulator:
+    """Merge chunk results; duplicate keys are tracked by `_KeyHashes`."""
+
+    def __init__(self, contract: TableContract):
+        self.contract = contract
+        self.rows = 0
+        self.counts: dict[tuple[str, str], int] = {}
+        self.hashes = {k: _KeyHashes() for k in contract.unique_keys}
+
+    def add(self, result: tuple[int, dict, dict]) -> None:
+        rows, counts, hashes = result
+        self.rows += rows
+        for k, v in counts.items():
+            self.counts[k] = self.counts.get(k, 0) + v
+        for key, h in hashes.items():
+            self.hashes[key].add(h)
+
+    def report(self, mode: str) -> pd.DataFrame:
+        rows = [
+            {"column": col, "rule": rule, "rows": n}
+            for (col, rule), n in self.counts.items()
+        ]
+        for key in self.contract.unique_keys:
+            rows.append({"column": "+".join(key), "rule": "unique", "rows": self.hashes[key].count_duplicates()})
+
+        out = pd.DataFrame(rows, columns=["column", "rule", "rows"])
+        out.insert(0, "flag", self.contract.name + "." + out["column"] + "." + out["rule"])
+        out["table"] = self.contract.name
+        out["rows_checked"] = self.rows
+        out["mode"] = mode
+        return out[["flag", "rows", "table", "column", "rule", "rows_checked", "mode"]]
+
+
+def validate_frame(df: pd.DataFrame, contract: TableContract) -> pd.DataFrame:
+    """Validate an in-memory DataFrame against a contract and return a per-rule report."""
+    acc = _Accumulator(contract)
+    acc.add(_check_chunk(df, contract))
+    return acc.report("full")
+
+
+def _estimate_rows(path: str | Path, probe_bytes: int = 1 << 20) -> int:
+    """Estimate data rows from file size and the line length of the first `probe_bytes`."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(probe_bytes)
+    lines = head.count(b"\n")
+    if len(head) >= size or not lines:
+        return max(lines - 1, 0)
+    return int(size / (len(head) / lines))
+
+
+def _read_range(f, start: int, end: int, header_end: int) -> bytes:
+    """Bytes of the lines starting in [start, end); assumes no newlines inside quoted fields."""
+    if start > header_end:
+        f.seek(start - 1)
+        f.readline()  # finish the line that started before `start`
+    else:
+        f.seek(header_end)
+    pos = f.tell()
+    if pos >= end:
+        return b""
+    data = f.read(end - pos)
+    if data and not data.endswith(b"\n"):
+        data += f.readline()
+    return data
+
+
+def _parse(header: bytes, data: bytes) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(header + data), dtype=str)
+
+
+def _check_range(path: str | Path, start: int, end: int, contract: TableContract) -> tuple[int, dict, dict]:
+    """Read, parse and check the lines starting in [start, end); runs inside a worker."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        data = _read_range(f, start, end, len(header))
+    if not data:
+        return 0, {}, {}
+    return _check_chunk(_parse(header, data), contract)
+
+
+def _sample_frame(path: str | Path, n_rows: int, seed: int, target_blocks: int = 1024) -> pd.DataFrame:
+    """Parse about `n_rows` rows from about `target_blocks` random byte blocks of the file.
+
+    Every line belongs to the block it starts in and blocks are drawn uniformly
+    without replacement, so each row is equally likely to be picked; the cost
+    depends on `n_rows`, not on file size.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        body = size - len(header)
+        line_bytes = body / max(_estimate_rows(path), 1)
+        want_bytes = 1.1 * n_rows * line_bytes  # small overshoot, trimmed below
+        block_bytes = max(math.ceil(want_bytes / min(n_rows, target_blocks)), 64)
+        n_blocks = max(math.ceil(body / block_bytes), 1)
+        k = math.ceil(want_bytes / block_bytes)
+        if k >= n_blocks:
+            f.seek(0)
+            df = pd.read_csv(f, dtype=str)
+        else:
+            picks = np.sort(np.random.default_rng(seed).choice(n_blocks, size=k, replace=False))
+            start = len(header)
+            data = b"".join(
+                _read_range(f, start + b * block_bytes, start + (b + 1) * block_bytes, start) for b in picks
+            )
+            df = _parse(header, data)
+    if len(df) > n_rows:
+        df = df.sample(n=n_rows, random_state=seed)
+    return df
+
+
+def validate_csv(
+    path: str | Path,
+    contract: TableContract,
+    mode: str = "full",
+    chunksize: int = 250_000,
+    workers: int | None = None,
+    sample_frac: float = 0.01,
+    max_sample_rows: int = 200_000,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Validate a CSV extract without loading it whole.
+
+    mode="full" splits the file into byte ranges of about `chunksize` rows.
+    Each worker process reads, parses and checks its own ranges, so parsing is
+    parallel too and no parsed chunk is pickled. At most 2 ranges per worker
+    are in flight, so memory stays bounded apart from the key hashes kept for
+    uniqueness checks. The check runs inline when workers=1 or the file fits in
+    one range, and never starts more workers than there are ranges. Byte ranges
+    assume no newlines inside quoted fields.
+
+    mode="sample" is for fast startup checks: it seeks to random byte blocks
+    across the whole file and parses min(sample_frac * estimated_rows,
+    max_sample_rows) rows from them, with the row count estimated from file
+    size. Its cost depends on the sample size, not the file size. Rows come in
+    small contiguous runs, so counts refer to the sample only and uniqueness
+    is a lower bound.
+    """
+    if mode not in ("full", "sample"):
+        raise ValueError(f"mode must be 'full' or 'sample', got {mode!r}")
+
+    acc = _Accumulator(contract)
+
+    if mode == "sample":
+        n_rows = max(min(max_sample_rows, math.ceil(sample_frac * _estimate_rows(path))), 1)
+        df = _sample_frame(path, n_rows, seed)
+        acc.add(_check_chunk(df, contract))
+        return acc.report(mode)
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header_end = len(f.readline())
+    line_bytes = (size - header_end) / max(_estimate_rows(path), 1)
+    range_bytes = max(int(chunksize * line_bytes), 1)
+    ranges = [(start, start + range_bytes) for start in range(header_end, size, range_bytes)]
+
+    workers = min(workers or os.cpu_count() or 1, len(ranges))
+    if workers <= 1:
+        for start, end in ranges:
+            acc.add(_check_range(path, start, end, contract))
+        return acc.report(mode)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        limit = 2 * workers
+        pending: deque = deque()
+        for start, end in ranges:
+            pending.append(pool.submit(_check_range, path, start, end, contract))
+            if len(pending) >= limit:
+                acc.add(pending.popleft().result())
+        while pending:
+            acc.add(pending.popleft().result())
+    return acc.report(mode)
+
+
+def validate_extracts(data_dir: str | Path | None = None, mode: str = "sample", **kwargs) -> pd.DataFrame:
+    """Validate every sample extract that has a contract; see `validate_csv` for options."""
+    from src.io import REQUIRED_FILES, project_root
+
+    data_dir = Path(data_dir) if data_dir is not None else (project_root() / "data" / "sample")
+    reports = [
+        validate_csv(data_dir / REQUIRED_FILES[name], contract, mode=mode, **kwargs)
+        for name, contract in CONTRACTS.items()
+    ]
+    return pd.concat(reports, ignore_index=True)
+
+
+def to_dq_summary(report: pd.DataFrame) -> pd.DataFrame:
+    """Reduce a contract report to the `flag,rows` layout of `dq_summary.csv`."""
+    return report[["flag", "rows"]].reset_index(drop=True)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Hashable
+
+
+class Superseded(Exception):
+    """Raised when a newer request from the same session replaced this one."""
+
+
+def checkpoint(cancel: threading.Event | None) -> None:
+    """Stop a running computation between stages once its request is stale."""
+    if cancel is not None and cancel.is_set():
+        raise Superseded()
+
+
+class _Failure:
+    """Cached exception of a failed computation, re-raised on later requests for its key."""
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class _Job:
+    """One computation shared by every request for the same key."""
+
+    def __init__(self, fn: Callable[[threading.Event], Any]):
+        self.fn = fn
+        self.future: Future = Future()
+        self.cancel = threading.Event()
+        self.started = False
+
+
+class CallbackExecutor:
+    """Run dashboard computations in a bounded worker pool.
+
+    - Identical concurrent requests (same `key`) share one computation.
+    - Each session only cares about its latest key: older requests stop waiting
+      and raise `Superseded`. Their work is cancelled if nobody else waits for
+      it: queued jobs never start, and running jobs see their cancel event set
+      and stop at the next `checkpoint(cancel)` inside `fn`.
+    - A session holds at most one worker for work nobody wants: a newer job
+      waits for the session's previous run only if that run has just been
+      cancelled (it stops at its next checkpoint). A previous run still wanted
+      by another session does not hold the new job back, and a job another
+      session joins is started at once, so no session queues behind work
+      it does not want.
+    - Sessions are kept in an LRU of `max_sessions` (one per page load); the
+      least recently active ones are forgotten and their work released.
+    - Each request waits at most `budget_s`; after that `run` returns the caller's
+      partial result while the full one keeps computing, so a later request
+      for the same key (e.g. a poll) picks it up from the result cache. Failures
+      are cached too, so a poll re-raises them instead of recomputing.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        budget_s: float = 1.5,
+        cache_size: int = 64,
+        poll_s: float = 0.05,
+        max_sessions: int = 1024,
+    ):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dash-slice")
+        self.budget_s = budget_s
+        self.cache_size = cache_size
+        self.poll_s = poll_s
+        self.max_sessions = max_sessions
+        self._lock = threading.RLock()  # cancel() runs _store synchronously under the lock
+        self._jobs: dict[Hashable, _Job] = {}
+        self._latest: OrderedDict[str, Hashable] = OrderedDict()
+        self._wanted: dict[Hashable, int] = {}  # key -> number of sessions whose latest key it is
+        self._session_runs: dict[str, tuple[Future, _Job]] = {}
+        self._cache: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def _store(self, key: Hashable, job: _Job) -> None:
+        with self._lock:
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+            fut = job.future
+            if fut.cancelled() or isinstance(fut.exception(), Superseded):
+                return
+            exc = fut.exception()
+            self._cache[key] = _Failure(exc) if exc is not None else fut.result()
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _want(self, key: Hashable, delta: int) -> None:
+        """Adjust the refcount of sessions wanting `key`; release it at zero. Caller holds the lock."""
+        n = self._wanted.get(key, 0) + delta
+        if n > 0:
+            self._wanted[key] = n
+            return
+        self._wanted.pop(key, None)
+        self._release(key)
+
+    def _release(self, key: Hashable) -> None:
+        """Cancel work for `key` once no session wants it. Caller holds the lock."""
+        if self._wanted.get(key):
+            return
+        job = self._jobs.get(key)
+        if job is not None:
+            job.cancel.set()
+            job.future.cancel()  # only succeeds while queued; _store then drops the job
+
+    def _call(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            checkpoint(job.cancel)
+            result = job.fn(job.cancel)
+        except BaseException as exc:
+            job.future.set_exception(exc)
+        else:
+            job.future.set_result(result)
+
+    def _start(self, session: str, job: _Job) -> None:
+        with self._lock:
+            if job.started or job.future.done():
+                return  # already started by a joining session, or cancelled while waiting
+            job.started = True
+            try:
+                run = self.pool.submit(self._call, job)
+            except RuntimeError:  # pool already shut down
+                job.future.cancel()
+                return
+            self._session_runs[session] = (run, job)
+            run.add_done_callback(lambda f, s=session: self._session_done(s, f))
+
+    def _session_done(self, session: str, run: Future) -> None:
+        with self._lock:
+            current = self._session_runs.get(session)
+            if current is not None and current[0] is run:
+                del self._session_runs[session]
+
+    def _schedule(self, session: str, job: _Job) -> None:
+        """Start `job` now, or after the session's cancelled run stops. Caller holds the lock."""
+        current = self._session_runs.get(session)
+        if current is None or current[0].done() or not current[1].cancel.is_set():
+            self._start(session, job)
+        else:
+            current[0].add_done_callback(lambda _f: self._start(session, job))
+
+    def run(
+        self,
+        session: str,
+        key: Hashable,
+        fn: Callable[[threading.Event], Any],
+        partial: Callable[[], Any] | None = None,
+        budget_s: float | None = None,
+    ) -> tuple[Any, bool]:
+        """Return `(result, True)`, or `(partial(), False)` if the budget ran out.
+
+        `budget_s` overrides the executor's budget for this call; 0 only checks
+        the cache and the job's state, e.g. for poll-triggered requests.
+
+        Exceptions raised by `fn` propagate, including to later requests for
+        the same key while the failure stays cached.
+
+        `fn` receives a cancel event and should call `checkpoint(cancel)`
+        between stages.
+        """
+        with self._lock:
+            previous = self._latest.pop(session, None)
+            self._latest[session] = key
+            if previous != key:
+                self._want(key, 1)
+                if previous is not None:
+                    self._want(previous, -1)
+            while len(self._latest) > self.max_sessions:
+                _, stale = self._latest.popitem(last=False)
+                self._want(stale, -1)
+
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                value = self._cache[key]
+                if isinstance(value, _Failure):
+                    raise value.exc
+                return value, True
+
+            job = self._jobs.get(key)
+            if job is None or job.cancel.is_set():
+                job = _Job(fn)
+                self._jobs[key] = job
+                job.future.add_done_callback(lambda _f, k=key, j=job: self._store(k, j))
+                self._schedule(session, job)
+            elif not job.started:
+                self._start(session, job)  # don't make this session wait behind another's cancelled run
+        fut = job.future
+
+        deadline = time.monotonic() + (self.budget_s if budget_s is None else budget_s)
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                return fut.result(timeout=max(0.0, min(self.poll_s, remaining))), True
+            except TimeoutError:
+                pass
+            except CancelledError:
+                raise Superseded(key)
+            if self._latest.get(session) != key:
+                raise Superseded(key)
+            if remaining <= 0:
+                return (partial() if partial is not None else None), False
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import base64
+import math
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+SLICERS = ("customer_segment", "category", "subcategory")
+
+
+def canonical_keys(values) -> pd.Series:
+    """Canonical string form hashed by sketches; persisted sketches depend on it.
+
+    Nulls are dropped, integral numbers are written without a fraction
+    (5400, 5400.0 and "5400.0" all become "5400"), other numbers use Python's
+    repr, and strings are stripped. Leading zeros in strings are kept.
+    """
+    s = pd.Series(values).dropna()
+    if pd.api.types.is_integer_dtype(s):
+        return s.astype(str)  # exact even above 2**53
+    if pd.api.types.is_float_dtype(s):
+        integral = ((s % 1 == 0) & (s.abs() < 2**63)).to_numpy()
+        out = pd.Series(index=s.index, dtype=object)
+        out[integral] = s[integral].astype(np.int64).astype(str)
+        out[~integral] = s[~integral].map(repr)
+        return out
+    out = s.astype(str).str.strip()
+    return out.str.replace(r"^(-?\d+)\.0+$", r"\1", regex=True)
+
+
+def _hash(values) -> np.ndarray:
+    return pd.util.hash_pandas_object(canonical_keys(values), index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    n = np.zeros(x.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        x = np.where(big, x >> np.uint64(shift), x)
+        n += big.astype(np.uint8) * shift
+    return n + (x > 0)
+
+
+def _index_rank(h: np.ndarray, p: int) -> tuple[np.ndarray, np.ndarray]:
+    """HyperLogLog register index (top p bits) and rank (leading zeros + 1 of the rest)."""
+    bits = np.uint64(64 - p)
+    idx = (h >> bits).astype(np.int64)
+    rest = h & ((np.uint64(1) << bits) - np.uint64(1))
+    return idx, (bits - _bit_length(rest) + 1).astype(np.uint8)
+
+
+def precision_for(rel_error: float) -> int:
+    """HyperLogLog precision p whose standard error 1.04/sqrt(2**p) is <= rel_error."""
+    p = math.ceil(math.log2((1.04 / rel_error) ** 2))
+    return min(max(p, 4), 18)
+
+
+class DistinctSketch:
+    """Mergeable distinct counter.
+
+    Approximate mode is a HyperLogLog with 2**p one-byte registers, with p chosen
+    so the relative standard error (1 sigma) is at most `rel_error`; this is
+    not a hard bound, and about 1 estimate in 20 is off by more than twice
+    that. It starts sparse: the sorted 64-bit value hashes are kept (and
+    counted exactly) until they would outgrow the registers, i.e. past
+    2**p / 8 values, and only then switches to dense registers. Exact mode
+    always keeps the hashes. Two sketches merge only if they share mode and
+    precision.
+    """
+
+    def __init__(self, rel_error: float = 0.02, exact: bool = False, p: int | None = None):
+        self.exact = exact
+        self.p = 0 if exact else (p if p is not None else precision_for(rel_error))
+        self.hashes: np.ndarray | None = np.empty(0, dtype=np.uint64)
+        self.registers: np.ndarray | None = None
+
+    @classmethod
+    def from_values(cls, values: Iterable, rel_error: float = 0.02, exact: bool = False) -> "DistinctSketch":
+        sk = cls(rel_error=rel_error, exact=exact)
+        sk.add(values)
+        return sk
+
+    @property
+    def sparse_limit(self) -> int:
+        return (1 << self.p) // 8
+
+    def _registers_from(self, h: np.ndarray) -> np.ndarray:
+        registers = np.zeros(1 << self.p, dtype=np.uint8)
+        idx, rank = _index_rank(h, self.p)
+        np.maximum.at(registers, idx, rank)
+        return registers
+
+    def _dense(self) -> np.ndarray:
+        return self.registers if self.registers is not None else self._registers_from(self.hashes)
+
+    def _maybe_densify(self) -> None:
+        if not self.exact and self.hashes is not None and len(self.hashes) > self.sparse_limit:
+            self.registers = self._registers_from(self.hashes)
+            self.hashes = None
+
+    def add(self, values: Iterable) -> "DistinctSketch":
+        h = _hash(values)
+        if self.hashes is not None:
+            self.hashes = np.union1d(self.hashes, h)
+            self._maybe_densify()
+        else:
+            self.registers = np.maximum(self.registers, self._registers_from(h))
+        return self
+
+    def merge(self, other: "DistinctSketch") -> "DistinctSketch":
+        if self.exact != other.exact or self.p != other.p:
+            raise ValueError("Cannot merge sketches with different mode or precision")
+        out = DistinctSketch(exact=self.exact, p=self.p)
+        if self.hashes is not None and other.hashes is not None:
+            out.hashes = np.union1d(self.hashes, other.hashes)
+            out._maybe_densify()
+        else:
+            out.hashes = None
+            out.registers = np.maximum(self._dense(), other._dense())
+        return out
+
+    __or__ = merge
+
+    def count(self) -> int:
+        if self.hashes is not None:
+            return int(len(self.hashes))
+
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int((self.registers == 0).sum())
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)  # linear counting for small ranges
+        return int(round(est))
+
+    def to_string(self) -> str:
+        """Serialize to an ASCII string suitable for CSV cells."""
+        if self.exact:
+            payload = b"E" + self.hashes.astype("<u8").tobytes()
+        elif self.hashes is not None:
+            payload = b"S" + bytes([self.p]) + self.hashes.astype("<u8").tobytes()
+        else:
+            payload = b"H" + bytes([self.p]) + self.registers.tobytes()
+        return base64.b64encode(payload).decode("ascii")
+
+    @classmethod
+    def from_string(cls, s: str) -> "DistinctSketch":
+        payload = base64.b64decode(s)
+        kind = payload[:1]
+        if kind == b"E":
+            sk = cls(exact=True)
+            sk.hashes = np.frombuffer(payload[1:], dtype="<u8").astype(np.uint64)
+        elif kind == b"S":
+            sk = cls(p=payload[1])
+            sk.hashes = np.frombuffer(payload[2:], dtype="<u8").astype(np.uint64)
+        else:
+            sk = cls(p=payload[1])
+            sk.hashes = None
+            sk.registers = np.frombuffer(payload[2:], dtype=np.uint8).copy()
+        return sk
+
+    def __repr__(self) -> str:
+        if self.exact:
+            mode = "exact"
+        else:
+            mode = f"hll p={self.p}, {'sparse' if self.hashes is not None else 'dense'}"
+        return f"DistinctSketch({mode}, ~{self.count()})"
+
+
+def merge_all(sketches: Iterable[DistinctSketch]) -> DistinctSketch | None:
+    out = None
+    for sk in sketches:
+        out = sk if out is None else out.merge(sk)
+    return out
+
+
+def _cell_sketches(cell_ids: np.ndarray, values: pd.Series, n_cells: int, rel_error: float, exact: bool) -> list[DistinctSketch]:
+    """One sketch per cell, hashing `values` once for the whole frame."""
+    keys = canonical_keys(values.reset_index(drop=True))
+    h = pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype=np.uint64)
+    cells = cell_ids[keys.index.to_numpy()]
+
+    order = np.lexsort((h, cells))
+    cells, h = cells[order], h[order]
+    keep = np.ones(len(h), dtype=bool)
+    keep[1:] = (cells[1:] != cells[:-1]) | (h[1:] != h[:-1])
+    cells, h = cells[keep], h[keep]
+    bounds = np.searchsorted(cells, np.arange(n_cells + 1))
+
+    out = []
+    for c in range(n_cells):
+        sk = DistinctSketch(rel_error=rel_error, exact=exact)
+        sk.hashes = h[bounds[c]:bounds[c + 1]]
+        sk._maybe_densify()  # only cells past the sparse limit build registers
+        out.append(sk)
+    return out
+
+
+def build_distinct_cube(df: pd.DataFrame, rel_error: float = 0.02, exact: bool = False) -> pd.DataFrame:
+    """Pre-aggregate an enriched fact table to one row per month x slicer cell.
+
+    Revenue and units are summed; distinct orders and customers are kept as
+    `DistinctSketch` objects so any range or slicer combination can be rolled
+    up with `rollup_kpis` / `rollup_monthly` without returning to raw rows.
+    `rel_error` is the relative standard error of approximate counts (and of
+    AOV / UPO derived from them), not a bound; pass exact=True for exact counts.
+    """
+    dims = ["year_month"] + [c for c in SLICERS if c in df.columns]
+    cust_col = "customer_key" if "customer_key" in df.columns else "customer_name"
+
+    keyed = df[df["year_month"].notna()].copy()
+    for c in dims[1:]:
+        keyed[c] = keyed[c].astype(str)  # match filter_df's string comparison
+
+    groups = keyed.groupby(dims, sort=True)
+    cube = groups.agg(revenue=("sales_amount", "sum"), units=("quantity", "sum")).reset_index()
+    cube[["revenue", "units"]] = cube[["revenue", "units"]].astype(float)
+    cell_ids = groups.ngroup().to_numpy()
+    cube["orders_sketch"] = _cell_sketches(cell_ids, keyed["order_number"], len(cube), rel_error, exact)
+    cube["customers_sketch"] = _cell_sketches(cell_ids, keyed[cust_col], len(cube), rel_error, exact)
+    return cube[dims + ["revenue", "units", "orders_sketch", "customers_sketch"]]
+
+
+def _select(cube: pd.DataFrame, start_month: str, end_month: str, segment: str, category: str, subcategory: str) -> pd.DataFrame:
+    out = cube[(cube["year_month"] >= start_month) & (cube["year_month"] <= end_month)]
+    for col, value in zip(SLICERS, (segment, category, subcategory)):
+        if value != "All" and col in out.columns:
+            out = out[out[col] == str(value)]
+    return out
+
+
+def _ratios(revenue: float, units: float, orders: int) -> dict:
+    return {
+        "aov": revenue / orders if orders else np.nan,
+        "asp": revenue / units if units else np.nan,
+        "upo": units / orders if orders else np.nan,
+    }
+
+
+def rollup_kpis(
+    cube: pd.DataFrame,
+    start_month: str,
+    end_month: str,
+    segment: str = "All",
+    category: str = "All",
+    subcategory: str = "All",
+) -> dict:
+    """Revenue, units, distinct orders/customers, AOV, ASP and UPO for a slice of the cube."""
+    sel = _select(cube, start_month, end_month, segment, category, subcategory)
+    revenue = float(sel["revenue"].sum())
+    units = float(sel["units"].sum())
+    orders_sk = merge_all(sel["orders_sketch"])
+    customers_sk = merge_all(sel["customers_sketch"])
+    orders = orders_sk.count() if orders_sk is not None else 0
+    customers = customers_sk.count() if customers_sk is not None else 0
+    return {
+        "revenue": revenue,
+        "orders": orders,
+        "units": units,
+        "customers": customers,
+        **_ratios(revenue, units, orders),
+    }
+
+
+def rollup_monthly(
+    cube: pd.DataFrame,
+    start_month: str,
+    end_month: str,
+    segment: str = "All",
+    category: str = "All",
+    subcategory: str = "All",
+) -> pd.DataFrame:
+    """Monthly revenue, orders, units, customers, AOV, ASP and UPO for a slice of the cube."""
+    sel = _select(cube, start_month, end_month, segment, category, subcategory)
+    rows = []
+    for ym, g in sel.groupby("year_month", sort=True):
+        revenue = float(g["revenue"].sum())
+        units = float(g["units"].sum())
+        orders = merge_all(g["orders_sketch"]).count()
+        customers = merge_all(g["customers_sketch"]).count()
+        rows.append(
+            {
+                "year_month": ym,
+                "revenue": revenue,
+                "orders": orders,
+                "units": units,
+                "customers": customers,
+                **_ratios(revenue, units, orders),
+            }
+        )
+    return pd.DataFrame(rows, columns=["year_month", "revenue", "orders", "units", "customers", "aov", "asp", "upo"])
+
+
+def cube_to_frame(cube: pd.DataFrame) -> pd.DataFrame:
+    """Encode sketches as strings so the cube can be written with `to_csv`."""
+    out = cube.copy()
+    for c in ["orders_sketch", "customers_sketch"]:
+        out[c] = out[c].map(DistinctSketch.to_string)
+    return out
+
+
+def cube_from_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of `cube_to_frame` (e.g. after `pd.read_csv(..., dtype=str)`)."""
+    out = df.copy()
+    for c in ["orders_sketch", "customers_sketch"]:
+        out[c] = out[c].map(DistinctSketch.from_string)
+    for c in ["revenue", "units"]:
+        out[c] = out[c].astype(float)
+    for c in ["year_month", *SLICERS]:
+        if c in out.columns:
+            out[c] = out[c].astype(str)
+    return out
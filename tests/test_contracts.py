@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import CONTRACTS, ColumnRule, TableContract, to_dq_summary, validate_csv, validate_frame
+
+
+@pytest.fixture
+def fact_csv(tmp_path):
+    n = 30_000
+    df = pd.DataFrame(
+        {
+            "order_number": [f"SO{i // 2}" for i in range(n)],
+            "product_key": np.tile([1, 2], n // 2),
+            "customer_key": np.arange(n) % 700 + 1,
+            "order_date": "2013-05-01",
+            "shipping_date": "2013-05-08",
+            "due_date": "2013-05-13",
+            "sales_amount": 10,
+            "quantity": 1,
+            "price": 10,
+        }
+    ).astype(object)
+    df.loc[[10, 20_000], "quantity"] = -1  # 2 range violations
+    df.loc[15_000, "order_date"] = "not a date"  # 1 dtype violation
+    df.loc[29_000, "customer_key"] = np.nan  # 1 null violation
+    df.loc[n] = df.loc[5]  # duplicate key at the far end of the file
+    path = tmp_path / "fact.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def counts(report: pd.DataFrame) -> dict:
+    return {flag: rows for flag, rows in to_dq_summary(report).itertuples(index=False) if rows}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_full_mode_counts_every_violation_across_chunks(fact_csv, workers):
+    report = validate_csv(fact_csv, CONTRACTS["fact_sales"], chunksize=4_000, workers=workers)
+    assert counts(report) == {
+        "fact_sales.quantity.range": 2,
+        "fact_sales.order_date.dtype": 1,
+        "fact_sales.customer_key.null": 1,
+        "fact_sales.order_number+product_key.unique": 1,
+    }
+    assert report["rows_checked"].iloc[0] == 30_001
+
+
+def test_full_mode_matches_in_memory_validation(fact_csv):
+    df = pd.read_csv(fact_csv, dtype=str)
+    assert counts(validate_frame(df, CONTRACTS["fact_sales"])) == counts(
+        validate_csv(fact_csv, CONTRACTS["fact_sales"], chunksize=1_000, workers=1)
+    )
+
+
+def test_sample_mode_covers_the_end_of_the_file(tmp_path):
+    q = np.ones(200_000, dtype=int)
+    q[-20_000:] = -1
+    path = tmp_path / "q.csv"
+    pd.DataFrame({"quantity": q}).to_csv(path, index=False)
+    contract = TableContract("t", {"quantity": ColumnRule("int", min_value=1)})
+
+    report = validate_csv(path, contract, mode="sample", sample_frac=0.1, max_sample_rows=5_000)
+    checked = report["rows_checked"].iloc[0]
+    violations = counts(report)["t.quantity.range"]
+    assert checked == 5_000
+    assert 0.05 < violations / checked < 0.15
+
+
+def test_missing_column_is_reported(tmp_path):
+    path = tmp_path / "p.csv"
+    pd.DataFrame({"product_key": [1, 2]}).to_csv(path, index=False)
+    report = validate_csv(path, CONTRACTS["dim_products"])
+    assert counts(report)["dim_products.product_name.missing_column"] == 2
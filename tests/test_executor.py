@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from src.core import CallbackExecutor, Superseded, checkpoint
+
+
+def work(calls: list, name: str, seconds: float = 0.0, fail: bool = False):
+    """Fake render function: records its call, sleeps in checkpointed steps, returns `name`."""
+
+    def fn(cancel):
+        calls.append(name)
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            time.sleep(0.01)
+            checkpoint(cancel)
+        if fail:
+            raise ValueError(name)
+        return name
+
+    return fn
+
+
+def in_thread(ex: CallbackExecutor, session: str, key, fn, **kwargs) -> tuple[threading.Thread, dict]:
+    out: dict = {}
+
+    def target():
+        start = time.monotonic()
+        try:
+            out["value"] = ex.run(session, key, fn, **kwargs)
+        except Superseded:
+            out["value"] = "superseded"
+        out["elapsed"] = time.monotonic() - start
+
+    t = threading.Thread(target=target)
+    t.start()
+    return t, out
+
+
+@pytest.fixture
+def ex():
+    executor = CallbackExecutor(max_workers=4, budget_s=1.0)
+    yield executor
+    executor.shutdown()
+
+
+def test_identical_requests_share_one_computation(ex):
+    calls = []
+    t1, r1 = in_thread(ex, "a", "k", work(calls, "k", 0.2))
+    time.sleep(0.05)
+    t2, r2 = in_thread(ex, "b", "k", work(calls, "k", 0.2))
+    t1.join()
+    t2.join()
+    assert r1["value"] == r2["value"] == ("k", True)
+    assert calls == ["k"]
+
+
+def test_superseded_running_job_stops_at_checkpoint(ex):
+    calls = []
+    t1, r1 = in_thread(ex, "a", "old", work(calls, "old", 5.0))
+    time.sleep(0.1)
+    t2, r2 = in_thread(ex, "a", "new", work(calls, "new", 0.05))
+    t1.join()
+    t2.join()
+    assert r1["value"] == "superseded"
+    assert r2["value"] == ("new", True)
+    assert r1["elapsed"] < 1.0
+
+
+def test_stale_queued_job_never_runs():
+    ex = CallbackExecutor(max_workers=1, budget_s=1.0)
+    calls = []
+    busy, _ = in_thread(ex, "other", "busy", work(calls, "busy", 0.3))
+    time.sleep(0.05)
+    t1, r1 = in_thread(ex, "a", "v0", work(calls, "v0"))
+    time.sleep(0.05)
+    t2, r2 = in_thread(ex, "a", "v1", work(calls, "v1"))
+    for t in (busy, t1, t2):
+        t.join()
+    ex.shutdown()
+    assert r1["value"] == "superseded"
+    assert r2["value"] == ("v1", True)
+    assert "v0" not in calls
+
+
+def test_other_sessions_do_not_wait_behind_a_cancelled_run(ex):
+    calls = []
+    ta, _ = in_thread(ex, "a", "all", work(calls, "all", 3.0))
+    tb, rb = in_thread(ex, "b", "all", work(calls, "all", 3.0))
+    time.sleep(0.1)
+    ta2, ra = in_thread(ex, "a", "small", work(calls, "small", 0.05))
+    time.sleep(0.02)
+    tc, rc = in_thread(ex, "c", "small", work(calls, "small", 0.05))
+    for t in (ta2, tc):
+        t.join()
+    assert ra["value"] == rc["value"] == ("small", True)
+    assert ra["elapsed"] < 0.5 and rc["elapsed"] < 0.5
+    ex.run("b", "done", lambda cancel: None)  # b moves on, so "all" is cancelled
+    ta.join()
+    tb.join()
+
+
+def test_budget_returns_partial_then_result_from_cache():
+    ex = CallbackExecutor(budget_s=0.1)
+    calls = []
+    fn = work(calls, "k", 0.3)
+    assert ex.run("a", "k", fn, partial=lambda: "partial") == ("partial", False)
+    time.sleep(0.4)
+    assert ex.run("a", "k", fn) == ("k", True)
+    assert calls == ["k"]
+    ex.shutdown()
+
+
+def test_zero_budget_poll_does_not_block(ex):
+    calls = []
+    fn = work(calls, "k", 0.5)
+    ex.run("a", "k", fn, budget_s=0)
+    start = time.monotonic()
+    assert ex.run("a", "k", fn, budget_s=0) == (None, False)
+    assert time.monotonic() - start < 0.05
+    time.sleep(0.6)
+    assert ex.run("a", "k", fn, budget_s=0) == ("k", True)
+
+
+def test_failure_is_cached_and_not_recomputed():
+    ex = CallbackExecutor(budget_s=0.05)
+    calls = []
+    fn = work(calls, "bad", 0.1, fail=True)
+    assert ex.run("a", "bad", fn, partial=lambda: "partial") == ("partial", False)
+    time.sleep(0.2)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            ex.run("a", "bad", fn, budget_s=0)
+    assert calls == ["bad"]
+    ex.shutdown()
+
+
+def test_sessions_are_bounded():
+    ex = CallbackExecutor(max_sessions=5)
+    for i in range(50):
+        ex.run(f"s{i}", i % 3, lambda cancel: "x")
+    assert len(ex._latest) == 5
+    assert sum(ex._wanted.values()) == 5
+    ex.shutdown()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import build_distinct_cube, compute_monthly, cube_from_frame, cube_to_frame, filter_df, kpis, rollup_kpis, rollup_monthly
+from src.core.sketches import DistinctSketch, canonical_keys
+
+
+@pytest.fixture(scope="module")
+def fact():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    orders = rng.integers(0, 6_000, n)
+    return pd.DataFrame(
+        {
+            "order_number": [f"SO{o}" for o in orders],
+            "customer_key": orders % 2_500,
+            "year_month": [f"2013-{m:02d}" for m in orders % 12 + 1],
+            "customer_segment": rng.choice(["New", "Regular", "VIP"], n),
+            "category": rng.choice(["Accessories", "Bikes", "Clothing"], n),
+            "subcategory": rng.choice(["A", "B"], n),
+            "sales_amount": rng.integers(1, 500, n).astype(float),
+            "quantity": rng.integers(1, 5, n),
+        }
+    )
+
+
+def test_canonical_keys_agree_across_dtypes():
+    assert canonical_keys(pd.Series([5400, 7])).tolist() == ["5400", "7"]
+    assert canonical_keys(pd.Series([5400.0, np.nan, 1.5])).tolist() == ["5400", "1.5"]
+    assert canonical_keys(pd.Series([" 5400.0 ", "007"])).tolist() == ["5400", "007"]
+
+
+def test_exact_mode_keeps_large_integers_apart():
+    assert DistinctSketch.from_values(pd.Series([2**53, 2**53 + 1]), exact=True).count() == 2
+
+
+def test_int_and_float_partitions_merge_without_double_counting():
+    a = DistinctSketch.from_values(pd.Series([1, 2, 3]))
+    b = DistinctSketch.from_values(pd.Series([1.0, 2.0, np.nan]))
+    assert (a | b).count() == 3
+
+
+@pytest.mark.parametrize("values", [range(100), range(5_000)])
+def test_round_trip_preserves_count(values):
+    for exact in (False, True):
+        sk = DistinctSketch.from_values(pd.Series(values), exact=exact)
+        assert DistinctSketch.from_string(sk.to_string()).count() == sk.count()
+
+
+def test_approximate_count_within_a_few_standard_errors():
+    sk = DistinctSketch.from_values(pd.Series(np.arange(200_000)), rel_error=0.02)
+    assert abs(sk.count() / 200_000 - 1) < 0.06
+
+
+def test_exact_cube_matches_nunique(fact):
+    cube = build_distinct_cube(fact, exact=True)
+    for args in [("2013-01", "2013-12", "All", "All", "All"), ("2013-03", "2013-07", "VIP", "Bikes", "A")]:
+        expected = kpis(filter_df(fact, *args))
+        got = rollup_kpis(cube, *args)
+        for k in ["revenue", "orders", "units", "customers", "aov", "upo"]:
+            assert got[k] == pytest.approx(expected[k])
+
+    monthly = rollup_monthly(cube, "2013-01", "2013-12")
+    assert monthly["orders"].tolist() == compute_monthly(fact)["orders"].tolist()
+
+
+def test_cube_survives_csv_round_trip(fact):
+    cube = build_distinct_cube(fact)
+    buf = io.StringIO()
+    cube_to_frame(cube).to_csv(buf, index=False)
+    buf.seek(0)
+    loaded = cube_from_frame(pd.read_csv(buf, dtype=str))
+    assert rollup_kpis(loaded, "2013-01", "2013-12") == rollup_kpis(cube, "2013-01", "2013-12")